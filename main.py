@@ -1,31 +1,29 @@
 #!/usr/bin/env python3
 import os
 import sys
-import json
+import orjson
 import argparse
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, TYPE_CHECKING
 
-from wanikani.client import WaniKaniAPI
-from wanikani.sentence_builder import SentenceBuilder
-from wanikani.models import UserKnowledge, WaniKaniItem, Reading, Meaning
+from wanikani.models import UserKnowledge, WaniKaniItem
+
+# The client and sentence builder pull in requests and openai, so they are
+# imported where they are used to keep --help and --stats-only startup fast
+if TYPE_CHECKING:
+    from wanikani.client import WaniKaniAPI
 
 CONFIG_DIR = Path.home() / ".config" / "speechbubble"
 CONFIG_FILE = CONFIG_DIR / "config.json"
 
 def load_config() -> Dict[str, str]:
     """Load configuration from config file"""
-    if not CONFIG_FILE.exists():
-        return {}
-    
-    with open(CONFIG_FILE) as f:
-        return json.load(f)
+    return orjson.loads(CONFIG_FILE.read_bytes()) if CONFIG_FILE.exists() else {}
 
 def save_config(config: Dict[str, str]) -> None:
     """Save configuration to config file"""
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(config, f, indent=2)
+    CONFIG_FILE.write_bytes(orjson.dumps(config, option=orjson.OPT_INDENT_2))
 
 def get_api_keys() -> tuple[str, str]:
     """Get API keys from config file or prompt user"""
@@ -48,100 +46,47 @@ def get_api_keys() -> tuple[str, str]:
     
     return wanikani_key, openai_key
 
-def fetch_vocabulary(api: WaniKaniAPI) -> list[WaniKaniItem]:
+def fetch_vocabulary(api: "WaniKaniAPI", refresh: bool = False) -> list[WaniKaniItem]:
     """Fetch vocabulary from WaniKani API"""
     print("Fetching vocabulary data...")
+    if refresh:
+        api.invalidate()
     
-    # Get raw vocabulary data
-    vocab_response = api._make_request(
-        "subjects",
-        params={"types": ["vocabulary"]}
-    )
-    
-    # Get assignments to check which items are started
-    assignments = api._make_request("assignments")
-    
-    # Get started vocabulary IDs with their SRS stages
-    started_vocab = {
-        a["data"]["subject_id"]: a["data"].get("srs_stage", 0)
-        for a in assignments["data"]
-        if (
-            a["data"].get("started_at") is not None
-            and a["data"]["subject_type"] == "vocabulary"
-        )
-    }
-    
-    # Convert response data to WaniKaniItems
-    vocab_items = []
-    for item in vocab_response["data"]:
-        if item["id"] in started_vocab:
-            data = item["data"]
-            vocab_items.append(
-                WaniKaniItem(
-                    id=item["id"],
-                    object=item["object"],
-                    level=data["level"],
-                    characters=data["characters"],
-                    meanings=[
-                        Meaning(
-                            meaning=m["meaning"],
-                            primary=m.get("primary", False),
-                            accepted_answer=m.get("accepted_answer", True)
-                        )
-                        for m in data["meanings"]
-                    ],
-                    readings=[
-                        Reading(
-                            reading=r["reading"],
-                            primary=r.get("primary", False),
-                            accepted_answer=r.get("accepted_answer", True),
-                            type=r.get("type", "reading")
-                        )
-                        for r in data["readings"]
-                    ],
-                    parts_of_speech=data.get("parts_of_speech", []),
-                    component_subject_ids=data.get("component_subject_ids", []),
-                    srs_stage=started_vocab[item["id"]],
-                    user_specific_data={"started_at": "2024-01-01"}
-                )
-            )
-    
-    return vocab_items
+    return list(api.get_started_vocabulary())
 
-def print_vocabulary_stats(vocab_items: list[WaniKaniItem]) -> None:
+def print_vocabulary_stats(knowledge: UserKnowledge) -> None:
     """Print vocabulary statistics"""
     # Count by part of speech
-    pos_counts = {}
-    for item in vocab_items:
-        for pos in item.parts_of_speech:
-            pos_counts[pos] = pos_counts.get(pos, 0) + 1
+    pos_counts = knowledge.pos_counts()
     
     print("\nVocabulary Statistics:")
-    print(f"Total vocabulary items: {len(vocab_items)}")
+    print(f"Total vocabulary items: {len(knowledge.vocabulary)}")
     print("\nBreakdown by part of speech:")
     for pos, count in sorted(pos_counts.items()):
         print(f"  {pos}: {count} words")
 
-def generate_sentences(vocab_items: list[WaniKaniItem], openai_key: str, num_sentences: int = 3, grammar_level: str = 'beginner') -> None:
+def generate_sentences(knowledge: UserKnowledge, openai_key: str, num_sentences: int = 3, grammar_level: str = 'beginner', reuse_responses: bool = False) -> None:
     """Generate sentences using the vocabulary"""
-    knowledge = UserKnowledge(
-        vocabulary=vocab_items,
-        kanji=[],
-        level=3
-    )
-    
-    builder = SentenceBuilder(knowledge, grammar_level=grammar_level, openai_api_key=openai_key)
+    from wanikani.sentence_builder import SentenceBuilder
+
+    builder = SentenceBuilder(knowledge, grammar_level=grammar_level, openai_api_key=openai_key, cache_responses=reuse_responses)
     print(f"\nGenerating {num_sentences} sentences...")
-    sentences = builder.generate_sentence_with_gpt(num_sentences=num_sentences)
+    # Print each sentence as soon as it has been generated
+    sentences = builder.iter_generate_sentence_with_gpt(num_sentences=num_sentences)
     
     for i, sentence in enumerate(sentences, 1):
-        print(f"\nSentence {i}:")
-        print(f"Japanese: {sentence['japanese']}")
-        print(f"Reading:  {sentence['reading']}")
-        print(f"English:  {sentence['english']}")
-        print("Word by word:")
+        # One write per sentence rather than one print per line
+        out = [
+            f"\nSentence {i}:\n",
+            f"Japanese: {sentence['japanese']}\n",
+            f"Reading:  {sentence['reading']}\n",
+            f"English:  {sentence['english']}\n",
+            "Word by word:\n",
+        ]
         for word in sentence['word_by_word']:
-            print(f"  {word['word']} ({word['reading']}) - {word['meaning']} [{word['pos']}]")
+            out.append(f"  {word['word']} ({word['reading']}) - {word['meaning']} [{word['pos']}]\n")
+        sys.stdout.write("".join(out))
+        sys.stdout.flush()
 
 def main():
     parser = argparse.ArgumentParser(description="Generate Japanese sentences using your WaniKani vocabulary")
@@ -151,6 +96,10 @@ def main():
                       default='beginner', help="Grammar level (default: beginner)")
     parser.add_argument("--stats-only", action="store_true",
                       help="Only show vocabulary statistics, don't generate sentences")
+    parser.add_argument("--refresh", action="store_true",
+                      help="Ignore cached WaniKani data and fetch it again")
+    parser.add_argument("--reuse-responses", action="store_true",
+                      help="Replay cached GPT responses for identical requests")
     args = parser.parse_args()
     
     try:
@@ -158,17 +107,25 @@ def main():
         wanikani_key, openai_key = get_api_keys()
         
         # Initialize WaniKani client
-        api = WaniKaniAPI(wanikani_key)
+        from wanikani.client import WaniKaniAPI
+        # One snapshot per account, like the knowledge cache
+        started_srs_file = CONFIG_DIR / f"started_srs_{wanikani_key[-8:]}.pickle"
+        api = WaniKaniAPI(wanikani_key, started_srs_path=started_srs_file)
         
         # Fetch vocabulary
-        vocab_items = fetch_vocabulary(api)
+        vocab_items = fetch_vocabulary(api, refresh=args.refresh)
+        knowledge = UserKnowledge(
+            vocabulary=vocab_items,
+            kanji=[],
+            level=3
+        )
         
         # Print statistics
-        print_vocabulary_stats(vocab_items)
+        print_vocabulary_stats(knowledge)
         
         # Generate sentences if requested
         if not args.stats_only:
-            generate_sentences(vocab_items, openai_key, args.num_sentences, args.level)
+            generate_sentences(knowledge, openai_key, args.num_sentences, args.level, args.reuse_responses)
             
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
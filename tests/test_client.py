@@ -0,0 +1,128 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import orjson
+
+from wanikani import client
+
+
+class FakeResponse:
+    def __init__(self, body: dict):
+        self.status_code = 200
+        self.headers = {}
+        self.content = orjson.dumps(body)
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    """Serves a paginated subjects collection from (id, level) pairs like the API does"""
+
+    def __init__(self, subjects, per_page):
+        self.subjects = sorted(subjects)
+        self.per_page = per_page
+        self.requests = 0
+        self.items_sent = 0
+        self.urls = []
+
+    def get(self, url, headers=None):
+        self.requests += 1
+        self.urls.append(url)
+        parts = urlsplit(url)
+        query = dict(parse_qsl(parts.query))
+        levels = {int(level) for level in query["levels"].split(",")} if "levels" in query else None
+        after_id = int(query.get("page_after_id", 0))
+
+        matching = [
+            (subject_id, level) for subject_id, level in self.subjects
+            if subject_id > after_id and (levels is None or level in levels)
+        ]
+        page = matching[:self.per_page]
+        self.items_sent += len(page)
+
+        next_url = None
+        if len(matching) > self.per_page:
+            query["page_after_id"] = str(page[-1][0])
+            next_url = urlunsplit(parts._replace(query=urlencode(query)))
+        return FakeResponse({
+            "object": "collection",
+            "pages": {"per_page": self.per_page, "next_url": next_url},
+            "total_count": len(matching) if after_id == 0 else None,
+            "data": [
+                {
+                    "id": subject_id,
+                    "object": "vocabulary",
+                    "data": {"level": level, "characters": str(subject_id), "meanings": [], "readings": []}
+                }
+                for subject_id, level in page
+            ]
+        })
+
+
+class MakeRequestTest(unittest.TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        patcher = mock.patch.object(client, "PAGE_CACHE_DIR", Path(cache_dir.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fetch(self, subjects, per_page, params):
+        api = client.WaniKaniAPI("test-api-key")
+        api._session = FakeSession(subjects, per_page)
+        return api._make_request("subjects", params=params)["data"], api._session
+
+    def assert_fetched_exactly(self, subjects, per_page, levels):
+        params = {"types": "vocabulary", "levels": ",".join(str(level) for level in levels)}
+        data, session = self.fetch(subjects, per_page, params)
+
+        expected = [subject_id for subject_id, level in sorted(subjects) if level in levels]
+        self.assertEqual([item["id"] for item in data], expected)
+        # Nothing outside the requested collection is transferred
+        self.assertEqual(session.items_sent, len(expected))
+        # Each level group pays at most one partially filled page
+        groups = client._split_levels(params["levels"], client.MAX_CONCURRENT_REQUESTS)
+        self.assertLessEqual(session.requests, -(-len(expected) // per_page) + len(groups))
+
+    def test_uneven_density(self):
+        # Later levels hold many more subjects, with ids interleaved between levels
+        subjects = [(i, 1 + i % 3) for i in range(1, 3001)]
+        subjects += [(i, 4 + i % 7) for i in range(3001, 9001)]
+        self.assert_fetched_exactly(subjects, 500, list(range(1, 11)))
+
+    def test_gaps_in_ids(self):
+        # Large id gaps between levels and some levels without subjects
+        subjects = [(level * 10_000 + i, level) for level in (1, 2, 5, 9) for i in range(0, 700 * level, 3)]
+        self.assert_fetched_exactly(subjects, 1000, list(range(1, 11)))
+
+    def test_single_level(self):
+        subjects = [(i, 1) for i in range(1, 2501)]
+        self.assert_fetched_exactly(subjects, 1000, [1])
+
+    def test_started_vocabulary_is_split_on_levels(self):
+        subjects = [(i, 1 + i * 60 // 9001) for i in range(1, 9001)]
+        api = client.WaniKaniAPI("test-api-key")
+        api._session = FakeSession(subjects, 1000)
+        started = {subject_id: 5 for subject_id, _ in subjects[::3]}
+        with mock.patch.object(api, "get_started_srs_stages", return_value=started):
+            vocabulary = api.get_started_vocabulary()
+
+        self.assertEqual([item.id for item in vocabulary], sorted(started))
+        self.assertTrue(all("levels=" in url for url in api._session.urls))
+        self.assertEqual(api._session.items_sent, len(subjects))
+
+    def test_without_levels_filter_is_paginated_sequentially(self):
+        subjects = [(i * 7, 1 + i % 5) for i in range(1, 9001)]
+        data, session = self.fetch(subjects, 1000, {"types": "vocabulary"})
+
+        self.assertEqual([item["id"] for item in data], [subject_id for subject_id, _ in subjects])
+        self.assertEqual(session.requests, 9)
+        self.assertEqual(session.items_sent, 9000)
+
+
+if __name__ == "__main__":
+    unittest.main()
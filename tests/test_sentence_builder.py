@@ -0,0 +1,112 @@
+import unittest
+from types import SimpleNamespace
+
+import orjson
+
+from wanikani.models import UserKnowledge
+from wanikani.sentence_builder import SentenceBuilder, _SentenceStreamParser
+
+SENTENCES = [
+    {
+        "japanese": "彼は「はい」と言った",
+        "reading": "かれは「はい」といった",
+        "english": 'He said "yes" {politely}',
+        "word_by_word": [
+            {"word": "彼", "reading": "かれ", "meaning": "he", "pos": "pronoun"},
+            {"word": "言った", "reading": "いった", "meaning": "said \\ told", "pos": "verb"},
+        ],
+    },
+    {
+        "japanese": "水を飲みます",
+        "reading": "みずをのみます",
+        "english": "I drink water",
+        "word_by_word": [
+            {"word": "水", "reading": "みず", "meaning": "water", "pos": "noun"},
+        ],
+    },
+]
+
+
+def chunked(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def response_text(sentences) -> str:
+    return orjson.dumps({"sentences": sentences}, option=orjson.OPT_INDENT_2).decode()
+
+
+class SentenceStreamParserTest(unittest.TestCase):
+    def feed_all(self, chunks):
+        parser = _SentenceStreamParser()
+        completed = []
+        for chunk in chunks:
+            completed.extend(parser.feed(chunk))
+        return completed
+
+    def test_chunk_sizes(self):
+        text = response_text(SENTENCES)
+        for size in (1, 2, 3, 7, 64, len(text)):
+            with self.subTest(size=size):
+                self.assertEqual(self.feed_all(chunked(text, size)), SENTENCES)
+
+    def test_sentence_completes_before_response_ends(self):
+        text = response_text(SENTENCES[:1])
+        end = text.rindex("}", 0, text.rindex("}")) + 1
+        parser = _SentenceStreamParser()
+        self.assertEqual(parser.feed(text[:end]), SENTENCES[:1])
+        self.assertEqual(parser.feed(text[end:]), [])
+
+    def test_escaped_quotes_and_braces_in_strings(self):
+        sentence = {"japanese": '\\"}{', "reading": "{", "english": "}\"", "word_by_word": []}
+        text = orjson.dumps({"sentences": [sentence]}).decode()
+        self.assertEqual(self.feed_all(chunked(text, 1)), [sentence])
+
+    def test_ignores_objects_outside_sentences_array(self):
+        text = orjson.dumps({
+            "note": {"sentences": [{"nested": True}]},
+            "sentences": SENTENCES,
+            "meta": {"note": "x"},
+            "extra": [{"japanese": "no"}],
+        }).decode()
+        self.assertEqual(self.feed_all(chunked(text, 4)), SENTENCES)
+
+
+class FakeCompletions:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def create(self, **kwargs):
+        return iter(self.chunks)
+
+
+class IterGenerateTest(unittest.TestCase):
+    def test_interleaved_choices(self):
+        # Two completions streamed at once, their deltas interleaved
+        streams = [chunked(response_text([sentence]), 5) for sentence in SENTENCES]
+        chunks = []
+        for i in range(max(map(len, streams))):
+            choices = [
+                SimpleNamespace(index=index, delta=SimpleNamespace(content=stream[i]))
+                for index, stream in enumerate(streams)
+                if i < len(stream)
+            ]
+            chunks.append(SimpleNamespace(choices=choices))
+
+        self.assertCountEqual(self.generate(chunks, 2), SENTENCES)
+
+    def test_one_sentence_per_choice(self):
+        # A completion drafting several sentences still contributes only one
+        chunks = [
+            SimpleNamespace(choices=[SimpleNamespace(index=0, delta=SimpleNamespace(content=chunk))])
+            for chunk in chunked(response_text(SENTENCES), 5)
+        ]
+        self.assertEqual(self.generate(chunks, 1), SENTENCES[:1])
+
+    def generate(self, chunks, num_sentences):
+        builder = SentenceBuilder(UserKnowledge([], [], 1), openai_api_key="test")
+        builder._client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions(chunks)))
+        return list(builder.iter_generate_sentence_with_gpt(num_sentences=num_sentences))
+
+
+if __name__ == "__main__":
+    unittest.main()
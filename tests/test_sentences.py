@@ -10,12 +10,6 @@ except ImportError:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 import json
 
-def get_srs_stage(assignments, subject_id):
-    for assignment in assignments:
-        if assignment['data']['subject_id'] == subject_id:
-            return assignment['data']['srs_stage']
-    return None
-
 def main():
     print("Fetching WaniKani data...")
     if not WANIKANI_API_KEY:
@@ -36,19 +30,27 @@ def main():
     print("\nFetching assignments...")
     assignments = api._make_request("assignments")
     
-    # Debug assignment counts
-    vocab_assignments = [
-        a for a in assignments["data"]
-        if a["data"]["subject_type"] == "vocabulary"
-    ]
-    started_assignments = [
-        a for a in vocab_assignments
-        if a["data"].get("started_at") is not None
-    ]
+    # Collect vocabulary assignment counts, SRS stage counts and started
+    # vocabulary IDs with their SRS stages in a single pass
+    vocab_count = 0
+    started_count = 0
+    stage_counts = [0] * 10
+    started_vocab = {}
+    for a in assignments["data"]:
+        d = a["data"]
+        if d["subject_type"] != "vocabulary":
+            continue
+        vocab_count += 1
+        if d.get("started_at") is None:
+            continue
+        stage = d.get("srs_stage", 0)
+        started_count += 1
+        stage_counts[stage] += 1
+        started_vocab[d["subject_id"]] = stage
     
     print("\nAssignment Statistics:")
-    print(f"Total vocabulary assignments: {len(vocab_assignments)}")
-    print(f"Started vocabulary assignments: {len(started_assignments)}")
+    print(f"Total vocabulary assignments: {vocab_count}")
+    print(f"Started vocabulary assignments: {started_count}")
     
     # Create SRS stage breakdown
     srs_stages = {
@@ -61,21 +63,14 @@ def main():
     
     print("\nSRS Stage Breakdown:")
     for stage_name, stages in srs_stages.items():
-        count = len([
-            a for a in started_assignments
-            if a["data"].get("srs_stage") in stages
-        ])
+        count = sum(stage_counts[stage] for stage in stages)
         print(f"{stage_name}: {count} items")
     
-    # Get started vocabulary IDs with their SRS stages
-    started_vocab = {
-        a["data"]["subject_id"]: a["data"].get("srs_stage", 0)
-        for a in assignments["data"]
-        if (
-            a["data"].get("started_at") is not None
-            and a["data"]["subject_type"] == "vocabulary"
-        )
-    }
+    # Stage name indexed by SRS stage number
+    stage_name_by_srs = ["started"] * 10
+    for stage_name, stages in srs_stages.items():
+        for stage in stages:
+            stage_name_by_srs[stage] = stage_name
     
     # Convert response data to WaniKaniItems
     vocab_items = []
@@ -144,17 +139,17 @@ def main():
         words = []
         for item_id, item in vocab_data.items():
             if any(pos in item.get('parts_of_speech', []) for pos in pos_types):
-                words.append(item)
+                words.append((item_id, item))
         
         print(f"{pos_name}: {len(words)} words")
         if words:
             print("Examples:\n")
-            for word in words[:5]:
-                srs_stage = started_vocab[item_id]
-                stage_name = next(
-                    (name for name, stages in srs_stages.items() 
-                     if srs_stage in stages),
-                    "started"
+            for word_id, word in words[:5]:
+                srs_stage = started_vocab[word_id]
+                stage_name = (
+                    stage_name_by_srs[srs_stage]
+                    if srs_stage is not None and 0 <= srs_stage < len(stage_name_by_srs)
+                    else "started"
                 )
                 print(f"  {word['characters']} ({word['readings'][0]['reading']}) - {word['meanings'][0]['meaning']}")
                 print(f"    Level: {word['level']}")
@@ -177,10 +172,7 @@ def main():
         print(f"Reading:  {reading}")
         print("Word-by-word:")
         for item in items:
-            if isinstance(item, dict):
-                print(f"  {item['characters']} ({item['reading']}) - {item['meaning']}")
-            else:
-                print(f"  {item.characters} ({item.primary_reading}) - {item.primary_meaning}")
+            print(f"  {item.characters} ({item.primary_reading}) - {item.primary_meaning}")
         print()
     
     # Try GPT-powered sentence generation if OpenAI API key is available
@@ -1,7 +1,19 @@
 """WaniKani API integration for sentence generation"""
 
-from .client import WaniKaniAPI
-from .models import UserKnowledge, WaniKaniItem, SrsStage
-from .sentence_builder import SentenceBuilder
+import importlib
 
-__all__ = ['WaniKaniAPI', 'UserKnowledge', 'WaniKaniItem', 'SrsStage', 'SentenceBuilder'] 
\ No newline at end of file
+from .models import UserKnowledge, WaniKaniItem, GrammarToken, SrsStage
+
+__all__ = ['WaniKaniAPI', 'UserKnowledge', 'WaniKaniItem', 'GrammarToken', 'SrsStage', 'SentenceBuilder']
+
+# Modules pulling in requests/openai are only imported on first access
+_LAZY_IMPORTS = {
+    'WaniKaniAPI': '.client',
+    'SentenceBuilder': '.sentence_builder',
+}
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
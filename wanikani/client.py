@@ -1,64 +1,238 @@
 import requests
-from typing import List, Dict, Optional, Union
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Any, List, Dict, Optional, Union
 from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import threading
+import hashlib
+import pickle
+import gzip
 import time
-import json
+import orjson
 from pathlib import Path
 from wanikani.models import WaniKaniItem, Reading, Meaning, UserKnowledge, SubjectType, SrsStage
 
+# WaniKani allows 60 requests per minute, 429 responses are retried by the
+# session after their Retry-After delay
+RATE_LIMIT_PER_MINUTE = 60
+MAX_CONCURRENT_REQUESTS = 4
+# Highest WaniKani level, for level filters that cover every subject
+MAX_LEVEL = 60
+
+CACHE_DIR = Path("wanikani/cache")
+# Revalidated API pages, one directory per account since several endpoints
+# answer differently depending on the API key
+PAGE_CACHE_DIR = CACHE_DIR / "pages"
+# Cached pages that haven't been fetched for this long are deleted
+PAGE_CACHE_MAX_AGE_DAYS = 30
+
+def _split_levels(levels: str, parts: int) -> List[str]:
+    """Split a comma separated levels filter into at most parts disjoint filters"""
+    values = levels.split(",")
+    # Deal levels out round-robin, later levels tend to have more subjects
+    return [",".join(values[i::parts]) for i in range(min(parts, len(values)))]
+
+@functools.lru_cache(maxsize=8)
+def _read_cache_file(cache_path: Path, mtime_ns: int) -> bytes:
+    """
+    Read a cache file, memoized until the file is rewritten. The raw bytes
+    are kept rather than the parsed data so every caller parses its own copy.
+    """
+    return cache_path.read_bytes()
+
+class RateLimiter:
+    """Request budget tracked from WaniKani's RateLimit-* response headers"""
+
+    def __init__(self, limit: int = RATE_LIMIT_PER_MINUTE):
+        self.limit = limit
+        self.remaining = limit
+        self.reset_at = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take a request from the budget, waiting for the window to reset if it's spent"""
+        with self._lock:
+            if self.remaining <= 0:
+                delay = self.reset_at - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                self.remaining = self.limit
+            self.remaining -= 1
+
+    def update(self, headers) -> None:
+        """Sync the budget with the headers of a response"""
+        try:
+            remaining = int(headers["RateLimit-Remaining"])
+            reset_at = float(headers["RateLimit-Reset"])
+        except (KeyError, ValueError):
+            return
+        with self._lock:
+            if reset_at > self.reset_at:
+                # A new window started
+                self.remaining = remaining
+                self.reset_at = reset_at
+            else:
+                # Responses can arrive out of order, keep the lowest count
+                self.remaining = min(self.remaining, remaining)
+
 class WaniKaniAPI:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, started_srs_path: Optional[Path] = None):
         self.api_key = api_key
+        # Optional snapshot of started vocabulary SRS stages, reused across runs
+        self.started_srs_path = started_srs_path
         self.base_url = "https://api.wanikani.com/v2"
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Wanikani-Revision": "20170710"
         }
+        # Share pooled keep-alive connections between all requests
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        self._session.mount("https://", HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=8,
+            max_retries=Retry(total=5, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504])
+        ))
+        self._rate_limiter = RateLimiter()
         # Create cache directory if it doesn't exist
-        Path("wanikani/cache").mkdir(parents=True, exist_ok=True)
+        self._page_cache_dir = PAGE_CACHE_DIR / api_key[-8:]
+        self._page_cache_dir.mkdir(parents=True, exist_ok=True)
+        self._etag_index_file = self._page_cache_dir / "etags.json"
+        # Validators of previously fetched pages, keyed by full request URL
+        self._etags = self._load_etag_index()
+        self._etags_lock = threading.Lock()
+        self._prune_page_cache()
+        # Memoized result of get_started_vocabulary
+        self._started_vocab: Optional[tuple[WaniKaniItem, ...]] = None
 
     def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
         """Make a request to the WaniKani API with automatic pagination"""
         url = f"{self.base_url}/{endpoint}"
-        results = []
-        
-        while url:
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            # For non-collection endpoints, return the data directly
-            if endpoint == "user":
-                return data
-            
-            # Add the current page's data to our results
-            if "data" in data:
-                results.extend(data["data"])
-            
-            # Get the next page URL if it exists
-            url = data.get("pages", {}).get("next_url")
-            
-            # Respect rate limiting
-            time.sleep(0.5)
-        
+
+        # For non-collection endpoints, return the data directly
+        if endpoint == "user":
+            return self._get(url, params)
+
+        levels = (params or {}).get("levels")
+        if endpoint == "subjects" and isinstance(levels, str):
+            # Split the collection on its levels filter into disjoint
+            # collections that are paginated concurrently
+            workers = max(1, min(MAX_CONCURRENT_REQUESTS, self._rate_limiter.remaining))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                collections = pool.map(
+                    lambda group: self._fetch_all_pages(url, {**params, "levels": group}),
+                    _split_levels(levels, workers)
+                )
+                results = [item for collection in collections for item in collection]
+            # Keep the id order of a single collection
+            results.sort(key=lambda item: item["id"])
+        else:
+            results = self._fetch_all_pages(url, params)
+
+        self._save_etag_index()
         return {"data": results}
 
-    def save_cache(self, data: Dict, filename: str) -> None:
-        """Save data to cache file with timestamp"""
+    def _fetch_all_pages(self, url: str, params: Optional[Dict] = None) -> List[Dict]:
+        """Fetch every page of a collection by following its next_url links"""
+        data = self._get(url, params)
+        results = list(data.get("data", []))
+        next_url = data.get("pages", {}).get("next_url")
+        while next_url:
+            data = self._get(next_url)
+            results.extend(data.get("data", []))
+            next_url = data.get("pages", {}).get("next_url")
+        return results
+
+    def _get(self, url: str, params: Optional[Dict] = None) -> Dict:
+        """Fetch a single page, revalidating any cached copy with the server"""
+        full_url = requests.Request("GET", url, params=params).prepare().url
+        headers = {}
+        cached = self._etags.get(full_url)
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        self._rate_limiter.acquire()
+        response = self._session.get(full_url, headers=headers)
+        self._rate_limiter.update(response.headers)
+
+        # Not modified, the cached body is still current
+        if response.status_code == 304 and cached:
+            try:
+                with gzip.open(cached["body_path"], "rb") as f:
+                    data = orjson.loads(f.read())
+                # Still in use, keep it from being pruned
+                Path(cached["body_path"]).touch()
+                return data
+            except (OSError, ValueError):
+                # Cached body is gone, fetch it again without validators
+                with self._etags_lock:
+                    self._etags.pop(full_url, None)
+                return self._get(full_url)
+
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            body_path = self._page_cache_dir / f"{hashlib.sha1(full_url.encode()).hexdigest()}.json.gz"
+            with gzip.open(body_path, "wb") as f:
+                f.write(response.content)
+            with self._etags_lock:
+                self._etags[full_url] = {
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "body_path": str(body_path)
+                }
+        return data
+
+    def _load_etag_index(self) -> Dict[str, Dict]:
+        """Load the validators of cached pages"""
+        try:
+            return orjson.loads(self._etag_index_file.read_bytes())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_etag_index(self) -> None:
+        """Persist the validators of cached pages"""
+        with self._etags_lock:
+            self._etag_index_file.write_bytes(orjson.dumps(self._etags))
+
+    def _prune_page_cache(self) -> None:
+        """Delete cached pages that are stale or no longer in the index"""
+        cutoff = time.time() - PAGE_CACHE_MAX_AGE_DAYS * 24 * 3600
+        for url, cached in list(self._etags.items()):
+            try:
+                stale = Path(cached["body_path"]).stat().st_mtime < cutoff
+            except OSError:
+                stale = True
+            if stale:
+                del self._etags[url]
+        kept = {Path(cached["body_path"]) for cached in self._etags.values()}
+        for body_path in self._page_cache_dir.glob("*.json.gz"):
+            if body_path not in kept:
+                body_path.unlink(missing_ok=True)
+        self._save_etag_index()
+
+    def save_cache(self, data: Any, filename: str) -> None:
+        """Save data to cache file with timestamp, dataclasses are serialized directly"""
         cache_data = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(),
             "data": data
         }
-        cache_path = Path("wanikani/cache") / f"{filename}.json"
-        with open(cache_path, "w", encoding="utf-8") as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
+        cache_path = CACHE_DIR / f"{filename}.json"
+        cache_path.write_bytes(orjson.dumps(cache_data, option=orjson.OPT_NON_STR_KEYS))
 
     def load_cache(self, filename: str, max_age_hours: int = 24) -> Optional[Dict]:
         """Load data from cache file if it's not too old"""
-        cache_path = Path("wanikani/cache") / f"{filename}.json"
+        cache_path = CACHE_DIR / f"{filename}.json"
         try:
-            with open(cache_path, "r", encoding="utf-8") as f:
-                cache_data = json.load(f)
+            cache_data = orjson.loads(_read_cache_file(cache_path, cache_path.stat().st_mtime_ns))
                 
             # Check cache age
             cache_time = datetime.fromisoformat(cache_data["timestamp"])
@@ -73,32 +247,33 @@ class WaniKaniAPI:
     def _convert_to_wanikani_item(self, raw_data: Dict, srs_stage: Optional[int] = None) -> WaniKaniItem:
         """Convert raw API data to WaniKaniItem"""
         data = raw_data["data"]
+        # Called once per subject, so bind the lookup once and pass
+        # constructor arguments positionally
+        get = dict.get
         return WaniKaniItem(
             id=raw_data["id"],
             object=raw_data["object"],
             level=data["level"],
             characters=data["characters"],
             meanings=[
-                Meaning(
-                    meaning=m["meaning"],
-                    primary=m.get("primary", False),
-                    accepted_answer=m.get("accepted_answer", True)
-                )
+                # meaning, primary, accepted_answer
+                Meaning(m["meaning"], get(m, "primary", False), get(m, "accepted_answer", True))
                 for m in data["meanings"]
             ],
             readings=[
+                # reading, primary, accepted_answer, type
                 Reading(
-                    reading=r["reading"],
-                    primary=r.get("primary", False),
-                    accepted_answer=r.get("accepted_answer", True),
-                    type=r.get("type", "reading")
+                    r["reading"],
+                    get(r, "primary", False),
+                    get(r, "accepted_answer", True),
+                    get(r, "type", "reading")
                 )
                 for r in data["readings"]
             ],
-            parts_of_speech=data.get("parts_of_speech", []),
-            component_subject_ids=data.get("component_subject_ids", []),
+            parts_of_speech=get(data, "parts_of_speech", []),
+            component_subject_ids=get(data, "component_subject_ids", []),
             srs_stage=srs_stage,
-            user_specific_data=raw_data.get("user_specific_data", {})
+            user_specific_data=get(raw_data, "user_specific_data", {})
         )
 
     def get_user_knowledge(self, use_cache: bool = True, max_age_hours: int = 24) -> UserKnowledge:
@@ -118,51 +293,37 @@ class WaniKaniAPI:
         assignments = self._make_request(
             "assignments",
             params={
-                "subject_types": ["vocabulary", "kanji"],
-                "started": True  # Only get started assignments
+                "subject_types": "vocabulary,kanji",
+                "started": "true"  # Only get started assignments
             }
         )
 
         # Create assignment lookup
-        assignment_lookup = {
-            a["data"]["subject_id"]: a["data"]["srs_stage"]
-            for a in assignments["data"]
-            if a["data"].get("started_at") is not None  # Only include started assignments
-        }
+        assignment_lookup = {}
+        for a in assignments["data"]:
+            d = a["data"]
+            if d.get("started_at") is not None:  # Only include started assignments
+                assignment_lookup[d["subject_id"]] = d["srs_stage"]
 
-        # Get vocabulary and kanji for the user's level and below
-        vocab_data = self._make_request(
-            "subjects",
-            params={
-                "types": ["vocabulary"],
-                "levels": list(range(1, user_level + 1))  # Get vocab up to current level
-            }
-        )
-        
-        kanji_data = self._make_request(
+        # Get vocabulary and kanji for the user's level and below in one
+        # collection, list filters are comma separated
+        subjects = self._make_request(
             "subjects",
             params={
-                "types": ["kanji"],
-                "levels": list(range(1, user_level + 1))  # Get kanji up to current level
+                "types": "vocabulary,kanji",
+                "levels": ",".join(str(level) for level in range(1, user_level + 1))
             }
         )
 
-        # Convert to WaniKaniItems
-        vocabulary = [
-            self._convert_to_wanikani_item(
-                v, 
-                srs_stage=assignment_lookup.get(v["id"])
-            )
-            for v in vocab_data["data"]
-        ]
-        
-        kanji = [
-            self._convert_to_wanikani_item(
-                k,
-                srs_stage=assignment_lookup.get(k["id"])
-            )
-            for k in kanji_data["data"]
-        ]
+        # Convert to WaniKaniItems, partitioned by subject type
+        vocabulary = []
+        kanji = []
+        for s in subjects["data"]:
+            item = self._convert_to_wanikani_item(s, srs_stage=assignment_lookup.get(s["id"]))
+            if s["object"] == SubjectType.VOCABULARY.value:
+                vocabulary.append(item)
+            elif s["object"] == SubjectType.KANJI.value:
+                kanji.append(item)
 
         knowledge = UserKnowledge(
             vocabulary=vocabulary,
@@ -172,11 +333,84 @@ class WaniKaniAPI:
 
         # Save to cache
         if use_cache:
-            self.save_cache(knowledge.to_dict(), cache_key)
+            self.save_cache(knowledge, cache_key)
 
         return knowledge
 
     def get_user_information(self) -> Dict:
         """Get user information including level and subscription status"""
         response = self._make_request("user")
-        return response.get("data", {}) 
\ No newline at end of file
+        return response.get("data", {})
+
+    def get_started_srs_stages(self, max_age_hours: int = 24) -> Dict[int, int]:
+        """
+        Get the SRS stage of every started vocabulary item, keyed by subject ID.
+        Served from the started_srs_path snapshot while it's fresh.
+        """
+        if self.started_srs_path:
+            try:
+                with open(self.started_srs_path, "rb") as f:
+                    snapshot = pickle.load(f)
+                age = datetime.now() - snapshot["last_refresh"]
+                # Snapshots written for another account are refetched
+                if snapshot["key_suffix"] == self.api_key[-8:] and age.total_seconds() / 3600 <= max_age_hours:
+                    return snapshot["srs_stages"]
+            except Exception:
+                # Missing, corrupt or from an older layout, refetch it
+                pass
+
+        # Get assignments to check which items are started
+        assignments = self._make_request(
+            "assignments",
+            params={"subject_types": "vocabulary", "started": "true"}
+        )
+
+        # Get started vocabulary IDs with their SRS stages
+        started_vocab = {}
+        for a in assignments["data"]:
+            d = a["data"]
+            if d.get("started_at") is not None and d["subject_type"] == "vocabulary":
+                started_vocab[d["subject_id"]] = d.get("srs_stage", 0)
+
+        if self.started_srs_path:
+            self.started_srs_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.started_srs_path, "wb") as f:
+                pickle.dump({
+                    "key_suffix": self.api_key[-8:],
+                    "last_refresh": datetime.now(),
+                    "srs_stages": started_vocab
+                }, f)
+
+        return started_vocab
+
+    def get_started_vocabulary(self) -> tuple[WaniKaniItem, ...]:
+        """Get all started vocabulary items, memoized until invalidate() is called"""
+        if self._started_vocab is not None:
+            return self._started_vocab
+
+        started_vocab = self.get_started_srs_stages()
+
+        # Get raw vocabulary data, revalidated against the page cache. A
+        # filter over every level lets the collection be fetched concurrently.
+        vocab_response = self._make_request(
+            "subjects",
+            params={
+                "types": "vocabulary",
+                "levels": ",".join(str(level) for level in range(1, MAX_LEVEL + 1))
+            }
+        )
+
+        # Convert only the started items to WaniKaniItems
+        self._started_vocab = tuple(
+            self._convert_to_wanikani_item(item, srs_stage=started_vocab[item["id"]])
+            for item in vocab_response["data"]
+            if item["id"] in started_vocab
+        )
+        return self._started_vocab
+
+    def invalidate(self) -> None:
+        """Drop cached API results so the next call refetches them"""
+        self._started_vocab = None
+        _read_cache_file.cache_clear()
+        if self.started_srs_path:
+            self.started_srs_path.unlink(missing_ok=True)
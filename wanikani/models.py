@@ -1,4 +1,5 @@
-from dataclasses import dataclass, asdict
+from collections import defaultdict
+from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
 from enum import Enum
 
@@ -14,26 +15,49 @@ class SrsStage(Enum):
     ENLIGHTENED = "enlightened"  # 8
     BURNED = "burned"      # 9
 
-@dataclass
+# SRS stage name indexed by stage number (0 is unstarted)
+_SRS_NAMES = (
+    None,
+    SrsStage.APPRENTICE.value,
+    SrsStage.APPRENTICE.value,
+    SrsStage.APPRENTICE.value,
+    SrsStage.APPRENTICE.value,
+    SrsStage.GURU.value,
+    SrsStage.GURU.value,
+    SrsStage.MASTER.value,
+    SrsStage.ENLIGHTENED.value,
+    SrsStage.BURNED.value,
+)
+
+@dataclass(slots=True)
 class Reading:
     reading: str
     primary: bool
     accepted_answer: bool
     type: str  # 'kunyomi', 'onyomi', or 'nanori' for kanji; 'reading' for vocabulary
 
-    def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
-
-@dataclass
+@dataclass(slots=True)
 class Meaning:
     meaning: str
     primary: bool
     accepted_answer: bool
 
-    def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+@dataclass(slots=True)
+class GrammarToken:
+    """A grammar element not covered by WaniKani, usable wherever a WaniKaniItem is displayed"""
+    characters: str
+    reading: str
+    meaning: str
+
+    @property
+    def primary_reading(self) -> str:
+        return self.reading
 
-@dataclass
+    @property
+    def primary_meaning(self) -> str:
+        return self.meaning
+
+@dataclass(slots=True)
 class WaniKaniItem:
     id: int
     object: str
@@ -45,20 +69,18 @@ class WaniKaniItem:
     component_subject_ids: List[int]  # Kanji used in vocabulary or radicals used in kanji
     srs_stage: Optional[int] = None
     user_specific_data: Optional[dict] = None
+    # Derived values, computed once on construction
+    _primary_reading: Optional[str] = field(init=False, repr=False, compare=False)
+    _primary_meaning: Optional[str] = field(init=False, repr=False, compare=False)
+    _srs_stage_name: Optional[str] = field(init=False, repr=False, compare=False)
 
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "object": self.object,
-            "level": self.level,
-            "characters": self.characters,
-            "meanings": [m.to_dict() for m in self.meanings],
-            "readings": [r.to_dict() for r in self.readings],
-            "parts_of_speech": self.parts_of_speech,
-            "component_subject_ids": self.component_subject_ids,
-            "srs_stage": self.srs_stage,
-            "user_specific_data": self.user_specific_data
-        }
+    def __post_init__(self):
+        self._primary_reading = next((r.reading for r in self.readings if r.primary), None)
+        self._primary_meaning = next((m.meaning for m in self.meanings if m.primary), None)
+        if self.srs_stage is None or not 0 <= self.srs_stage < len(_SRS_NAMES):
+            self._srs_stage_name = None
+        else:
+            self._srs_stage_name = _SRS_NAMES[self.srs_stage]
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'WaniKaniItem':
@@ -70,45 +92,41 @@ class WaniKaniItem:
     @property
     def primary_reading(self) -> Optional[str]:
         """Get the primary reading for this item"""
-        primary_readings = [r.reading for r in self.readings if r.primary]
-        return primary_readings[0] if primary_readings else None
+        return self._primary_reading
 
     @property
     def primary_meaning(self) -> Optional[str]:
         """Get the primary meaning for this item"""
-        primary_meanings = [m.meaning for m in self.meanings if m.primary]
-        return primary_meanings[0] if primary_meanings else None
+        return self._primary_meaning
 
     @property
     def srs_stage_name(self) -> Optional[str]:
         """Get the SRS stage name"""
-        if self.srs_stage is None:
-            return None
-        if 1 <= self.srs_stage <= 4:
-            return SrsStage.APPRENTICE.value
-        elif 5 <= self.srs_stage <= 6:
-            return SrsStage.GURU.value
-        elif self.srs_stage == 7:
-            return SrsStage.MASTER.value
-        elif self.srs_stage == 8:
-            return SrsStage.ENLIGHTENED.value
-        elif self.srs_stage == 9:
-            return SrsStage.BURNED.value
-        return None
-
-@dataclass
+        return self._srs_stage_name
+
+@dataclass(slots=True)
 class UserKnowledge:
     vocabulary: List[WaniKaniItem]
     kanji: List[WaniKaniItem]
     level: int
-    
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            "vocabulary": [v.to_dict() for v in self.vocabulary],
-            "kanji": [k.to_dict() for k in self.kanji],
-            "level": self.level
-        }
+    # Lookup indexes, built once on construction
+    _pos_index: Dict[str, List[WaniKaniItem]] = field(init=False, repr=False, compare=False)
+    _level_index: Dict[int, List[WaniKaniItem]] = field(init=False, repr=False, compare=False)
+    _srs_index: Dict[Optional[str], List[WaniKaniItem]] = field(init=False, repr=False, compare=False)
+    _kanji_by_id: Dict[int, WaniKaniItem] = field(init=False, repr=False, compare=False)
 
+    def __post_init__(self):
+        # Build lookup indexes in a single pass over the vocabulary
+        self._pos_index = defaultdict(list)
+        self._level_index = defaultdict(list)
+        self._srs_index = defaultdict(list)
+        for v in self.vocabulary:
+            for pos in v.parts_of_speech:
+                self._pos_index[pos].append(v)
+            self._level_index[v.level].append(v)
+            self._srs_index[v.srs_stage_name].append(v)
+        self._kanji_by_id = {k.id: k for k in self.kanji}
+    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'UserKnowledge':
         return cls(
@@ -119,16 +137,24 @@ class UserKnowledge:
     
     def get_vocab_by_level(self, level: int) -> List[WaniKaniItem]:
         """Get vocabulary items for a specific level"""
-        return [v for v in self.vocabulary if v.level == level]
+        return list(self._level_index.get(level, ()))
     
     def get_vocab_by_srs(self, stage: SrsStage) -> List[WaniKaniItem]:
         """Get vocabulary items at a specific SRS stage"""
-        return [v for v in self.vocabulary if v.srs_stage_name == stage.value]
+        return list(self._srs_index.get(stage.value, ()))
     
     def get_vocab_by_parts_of_speech(self, pos: str) -> List[WaniKaniItem]:
         """Get vocabulary items by part of speech"""
-        return [v for v in self.vocabulary if pos in v.parts_of_speech]
+        return list(self._pos_index.get(pos, ()))
+
+    def pos_counts(self) -> Dict[str, int]:
+        """Number of vocabulary items per part of speech"""
+        return {pos: len(items) for pos, items in self._pos_index.items()}
     
     def get_kanji_in_vocab(self, vocab_item: WaniKaniItem) -> List[WaniKaniItem]:
         """Get all kanji components of a vocabulary item"""
-        return [k for k in self.kanji if k.id in vocab_item.component_subject_ids] 
\ No newline at end of file
+        return [
+            self._kanji_by_id[subject_id]
+            for subject_id in vocab_item.component_subject_ids
+            if subject_id in self._kanji_by_id
+        ] 
\ No newline at end of file
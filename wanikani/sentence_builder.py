@@ -1,10 +1,23 @@
-from typing import List, Optional, Dict, Union
-from wanikani.client import WaniKaniAPI
-from wanikani.models import UserKnowledge, WaniKaniItem, SrsStage
+from collections import defaultdict
+from functools import cached_property, lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Final, Iterator, List, Mapping, Optional, Dict, Union
+from wanikani.models import UserKnowledge, WaniKaniItem, SrsStage, GrammarToken
+import dbm
+import hashlib
 import random
-import openai
+import re
+import shelve
+import sys
+import time
 import os
-import json
+import orjson
+
+# openai pulls in httpx and pydantic, so it is only imported once a sentence
+# is actually generated with GPT
+if TYPE_CHECKING:
+    import openai
 
 # Basic grammar elements not covered by WaniKani
 GRAMMAR_ELEMENTS = {
@@ -41,24 +54,221 @@ GRAMMAR_ELEMENTS = {
     }
 }
 
+# GRAMMAR_ELEMENTS as GrammarTokens, which share their attribute names with
+# WaniKaniItem so sentence items can be displayed uniformly
+GRAMMAR_TOKENS = {
+    level: {
+        category: {key: GrammarToken(**info) for key, info in items.items()}
+        for category, items in categories.items()
+    }
+    for level, categories in GRAMMAR_ELEMENTS.items()
+}
+
+def _merge_grammar(levels: List[str]) -> Mapping[str, Mapping[str, GrammarToken]]:
+    """Merge the grammar categories of several levels into a read-only mapping"""
+    elements = {}
+    for level in levels:
+        for category, items in GRAMMAR_TOKENS[level].items():
+            elements.setdefault(category, {}).update(items)
+    return MappingProxyType({
+        category: MappingProxyType(items) for category, items in elements.items()
+    })
+
+# Grammar available at each level, always including the beginner elements
+MERGED_GRAMMAR = {
+    level: _merge_grammar(['beginner', level])
+    for level in GRAMMAR_TOKENS
+}
+
+# The same merged grammar as parallel (characters, readings, meanings) tuples
+# per level and category, for loops that only read the display strings
+GRAMMAR_COLUMNS = {
+    level: {
+        category: (
+            tuple(token.characters for token in tokens.values()),
+            tuple(token.reading for token in tokens.values()),
+            tuple(token.meaning for token in tokens.values()),
+        )
+        for category, tokens in categories.items()
+    }
+    for level, categories in MERGED_GRAMMAR.items()
+}
+
+# Maps a WaniKani part of speech tag to its bucket through the matching group
+# name. "verb" has to be a whole word so adverbs and verbal nouns aren't verbs.
+_POS_RE = re.compile(r"(?P<verb>\bverb\b)|(?P<adjective>[いなの] adjective)")
+
+GPT_MODEL: Final[str] = "gpt-4o-mini"
+
+# Upper bound on the input tokens spent on vocabulary in the prompt
+VOCAB_TOKEN_BUDGET = 1000
+
+@lru_cache(maxsize=None)
+def _encoding():
+    """tiktoken encoding for GPT_MODEL, or None when it isn't available"""
+    try:
+        import tiktoken
+        # Downloads the encoding on first use, which fails offline
+        return tiktoken.encoding_for_model(GPT_MODEL)
+    except Exception:
+        return None
+
+def _count_tokens(text: str) -> int:
+    """
+    Number of tokens text takes up in the prompt. Without tiktoken this falls
+    back to the UTF-8 length, an upper bound since every token covers at
+    least one byte.
+    """
+    encoding = _encoding()
+    if encoding is None:
+        return len(text.encode())
+    return len(encoding.encode(text))
+
+# On-disk cache of GPT responses keyed by a hash of the request
+RESPONSE_CACHE_FILE = Path.home() / ".cache" / "speechbubble" / "gpt.db"
+RESPONSE_CACHE_MAX_AGE_HOURS = 24
+
+_SYSTEM_INSTRUCTIONS: Final[str] = (
+    "You are a Japanese language expert. Generate natural Japanese sentences using only "
+    "the provided vocabulary and grammar elements. Ensure all responses are in the "
+    "specified JSON format.\n\n"
+)
+
+# Example response shown to GPT, one sentence per completion
+_SENTENCE_JSON_EXAMPLE: Final[str] = '''
+{
+  "sentences": [
+    {
+      "japanese": "日本語を勉強します",
+      "reading": "にほんごをべんきょうします",
+      "english": "I will study Japanese",
+      "word_by_word": [
+        {
+          "word": "日本語",
+          "reading": "にほんご",
+          "meaning": "Japanese language",
+          "pos": "noun"
+        },
+        {
+          "word": "を",
+          "reading": "を",
+          "meaning": "object marker",
+          "pos": "particle"
+        },
+        {
+          "word": "勉強",
+          "reading": "べんきょう",
+          "meaning": "study",
+          "pos": "noun"
+        },
+        {
+          "word": "します",
+          "reading": "します",
+          "meaning": "to do",
+          "pos": "verb"
+        }
+      ]
+    }
+  ]
+}
+'''
+
+_RESPONSE_FORMAT_INSTRUCTIONS: Final[str] = (
+    "\n\nFor each sentence provide:\n"
+    "1. The Japanese sentence\n"
+    "2. The reading in hiragana\n"
+    "3. English translation\n"
+    "4. Word-by-word breakdown showing:\n"
+    "   - The word in Japanese\n"
+    "   - Its reading\n"
+    "   - Its meaning\n"
+    "   - Its part of speech\n\n"
+    "Format your response in JSON like this:\n"
+    + _SENTENCE_JSON_EXAMPLE
+)
+
+class _SentenceStreamParser:
+    """
+    Incrementally parses a streamed {"sentences": [...]} JSON response,
+    returning each element of the top-level sentences array as soon as its
+    closing brace arrives
+    """
+
+    def __init__(self):
+        self._buffer = []
+        # Open objects and arrays, "{" or "["
+        self._stack = []
+        self._in_string = False
+        self._escaped = False
+        # Top-level strings are collected to know which key a value belongs to
+        self._string = []
+        self._key = None
+        self._capturing = False
+
+    def feed(self, text: str) -> List[Dict[str, str]]:
+        """Consume a chunk of the response and return the sentences it completed"""
+        completed = []
+        stack = self._stack
+        for char in text:
+            if self._capturing:
+                self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    # The last top-level string before a value is its key
+                    if stack == ["{"]:
+                        self._key = "".join(self._string)
+                    continue
+                if stack == ["{"]:
+                    self._string.append(char)
+            elif char == '"':
+                self._in_string = True
+                self._string = []
+            elif char in "{[":
+                # Sentence objects sit directly in the top-level sentences array
+                if char == "{" and stack == ["{", "["] and self._key == "sentences":
+                    self._capturing = True
+                    self._buffer = ["{"]
+                stack.append(char)
+            elif char in "}]":
+                stack.pop()
+                if self._capturing and stack == ["{", "["]:
+                    completed.append(orjson.loads("".join(self._buffer)))
+                    self._buffer = []
+                    self._capturing = False
+        return completed
+
 class SentenceBuilder:
-    def __init__(self, knowledge: UserKnowledge, grammar_level: str = 'beginner', openai_api_key: Optional[str] = None):
+    def __init__(self, knowledge: UserKnowledge, grammar_level: str = 'beginner', openai_api_key: Optional[str] = None, cache_responses: bool = False, vocab_token_budget: int = VOCAB_TOKEN_BUDGET):
         self.knowledge = knowledge
         self.grammar_level = grammar_level
-        self.started_vocab = set()  # Will store IDs of started vocabulary
+        # Vocabulary stops being added to the prompt once it would exceed this
+        self.vocab_token_budget = vocab_token_budget
+        # Replay GPT responses for identical requests instead of calling OpenAI again
+        self.cache_responses = cache_responses
         self._initialize_started_vocab()
+        self._pos_index = self._build_pos_index()
+        # Prompt candidates per part of speech: the best-known words first,
+        # ties broken by subject id so the prompt is stable across runs
+        self._ranked_per_pos = {
+            pos: sorted(words, key=lambda w: (-(w.srs_stage or 0), w.id))
+            for pos, words in self._pos_index.items()
+        }
         self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
-        if self.openai_api_key:
-            openai.api_key = self.openai_api_key
+        self._client: Optional["openai.OpenAI"] = None
         
     def _initialize_started_vocab(self):
-        """Initialize the set of started vocabulary IDs"""
-        for word in self.knowledge.vocabulary:
-            if word.user_specific_data.get('started_at'):
-                self.started_vocab.add(word.id)
+        """Initialize the started vocabulary items and the set of their IDs"""
+        # Only started items have an SRS stage
+        self._started = [w for w in self.knowledge.vocabulary if w.srs_stage is not None]
+        self.started_vocab = {w.id for w in self._started}
     
-    def get_available_words_by_pos(self) -> Dict[str, List[WaniKaniItem]]:
-        """Get available words organized by part of speech, only including started items"""
+    def _build_pos_index(self) -> Mapping[str, tuple[WaniKaniItem, ...]]:
+        """Bucket started words by normalized part of speech in a single pass"""
         pos_dict = {
             "verb": [],
             "noun": [],
@@ -66,75 +276,136 @@ class SentenceBuilder:
             "adverb": [],
             "expression": []
         }
+        # Only a handful of distinct tags exist, normalize each one once
+        normalized = {}
         
-        for word in self.knowledge.vocabulary:
-            if word.id not in self.started_vocab:
-                continue
-                
+        for word in self._started:
+            buckets = set()
             for pos in word.parts_of_speech:
-                normalized_pos = self._normalize_pos(pos)
-                if normalized_pos in pos_dict:
-                    pos_dict[normalized_pos].append(word)
+                bucket = normalized.get(pos)
+                if bucket is None:
+                    bucket = normalized[pos] = self._normalize_pos(pos)
+                # A word tagged e.g. both "godan verb" and "transitive verb"
+                # is still only listed once per bucket
+                if bucket in pos_dict and bucket not in buckets:
+                    buckets.add(bucket)
+                    pos_dict[bucket].append(word)
         
-        return pos_dict
+        # Read-only, like MERGED_GRAMMAR, since it is handed out as-is
+        return MappingProxyType({pos: tuple(words) for pos, words in pos_dict.items()})
+
+    @property
+    def available_words_by_pos(self) -> Mapping[str, tuple[WaniKaniItem, ...]]:
+        """Available words organized by part of speech, only including started items"""
+        return self._pos_index
+
+    def get_available_words_by_pos(self) -> Dict[str, List[WaniKaniItem]]:
+        """Get available words organized by part of speech, only including started items"""
+        return {pos: list(words) for pos, words in self._pos_index.items()}
     
     def _normalize_pos(self, pos: str) -> str:
         """Normalize part of speech categories"""
-        if any(verb_type in pos for verb_type in ['ichidan verb', 'godan verb', 'verb']):
-            return 'verb'
-        if any(adj_type in pos for adj_type in ['い adjective', 'な adjective', 'の adjective']):
-            return 'adjective'
-        return pos
+        match = _POS_RE.search(pos)
+        return match.lastgroup if match else pos
     
-    def get_grammar_elements(self) -> dict:
+    @property
+    def grammar_elements(self) -> Mapping[str, Mapping[str, GrammarToken]]:
+        """Grammar elements for the current level"""
+        return MERGED_GRAMMAR.get(self.grammar_level, MERGED_GRAMMAR['beginner'])
+
+    def get_grammar_elements(self) -> Mapping[str, Mapping[str, GrammarToken]]:
         """Get grammar elements for the current level"""
-        elements = {}
-        for level in ['beginner', self.grammar_level]:
-            if level in GRAMMAR_ELEMENTS:
-                for category, items in GRAMMAR_ELEMENTS[level].items():
-                    if category not in elements:
-                        elements[category] = {}
-                    elements[category].update(items)
-        return elements
+        return self.grammar_elements
+
+    def _invalidate(self) -> None:
+        """Drop the cached prompt, e.g. after changing grammar_level or vocab_token_budget"""
+        self.__dict__.pop('_static_prefix', None)
     
+    def _ranked_vocabulary_lines(self) -> Iterator[tuple[str, str]]:
+        """
+        (part of speech, prompt line) for every candidate word, taking turns
+        between parts of speech so each gets its best-known words in first
+        """
+        depth = max(map(len, self._ranked_per_pos.values()), default=0)
+        for rank in range(depth):
+            for pos, words in self._ranked_per_pos.items():
+                if rank < len(words):
+                    word = words[rank]
+                    yield pos, f"- {word.characters} ({word.primary_reading}) - {word.primary_meaning}\n"
+
     def get_vocabulary_prompt(self) -> str:
         """Generate a prompt for LLM sentence generation"""
-        available_words = self.get_available_words_by_pos()
-        grammar = self.get_grammar_elements()
+        grammar = GRAMMAR_COLUMNS.get(self.grammar_level, GRAMMAR_COLUMNS['beginner'])
         
-        prompt = "Generate a natural Japanese sentence using these components:\n\n"
-        prompt += "Available vocabulary:\n"
+        parts = [
+            "Generate a natural Japanese sentence using these components:\n\n",
+            "Available vocabulary:\n"
+        ]
         
-        for pos, words in available_words.items():
-            if words:
-                prompt += f"\n{pos.title()}s:\n"
-                for word in words[:5]:  # Limit to 5 examples per category
-                    prompt += f"- {word.characters} ({word.primary_reading}) - {word.primary_meaning}\n"
+        # Pack vocabulary lines until the token budget is used up, counting
+        # each line once as it is added rather than re-encoding the prompt
+        lines = {pos: [] for pos in self._ranked_per_pos}
+        tokens = 0
+        for pos, line in self._ranked_vocabulary_lines():
+            # A heading is paid for together with the first word under it
+            cost = _count_tokens(line) if lines[pos] else _count_tokens(f"\n{pos.title()}s:\n{line}")
+            if tokens + cost > self.vocab_token_budget:
+                break
+            tokens += cost
+            lines[pos].append(line)
         
-        prompt += "\nAvailable grammar elements:\n"
-        for category, elements in grammar.items():
-            prompt += f"\n{category.title()}:\n"
-            for char, info in elements.items():
-                prompt += f"- {info['characters']} ({info['reading']}) - {info['meaning']}\n"
+        for pos, pos_lines in lines.items():
+            if pos_lines:
+                parts.append(f"\n{pos.title()}s:\n")
+                parts.extend(pos_lines)
         
-        prompt += "\nPlease generate a natural sentence using some of these vocabulary items and grammar elements."
-        return prompt
+        parts.append("\nAvailable grammar elements:\n")
+        for category, (chars, readings, meanings) in grammar.items():
+            parts.append(f"\n{category.title()}:\n")
+            for c, r, m in zip(chars, readings, meanings):
+                parts.append(f"- {c} ({r}) - {m}\n")
+        
+        parts.append("\nPlease generate a natural sentence using some of these vocabulary items and grammar elements.")
+        return "".join(parts)
     
-    def build_basic_sentence(self) -> Optional[tuple[str, str, List[Union[WaniKaniItem, dict]]]]:
+    @cached_property
+    def _static_prefix(self) -> str:
+        """
+        System message holding everything that doesn't change between calls:
+        instructions, vocabulary, grammar and the response format
+        """
+        return "".join((_SYSTEM_INSTRUCTIONS, self.get_vocabulary_prompt(), _RESPONSE_FORMAT_INSTRUCTIONS))
+
+    def _messages(self) -> List[Dict[str, str]]:
+        """
+        Chat messages for a generation request. The static prefix comes first
+        and is byte-identical across calls so OpenAI can serve it from its
+        prompt cache.
+        """
+        return [
+            {"role": "system", "content": self._static_prefix},
+            {"role": "user", "content": self._dynamic_suffix()}
+        ]
+
+    def _dynamic_suffix(self) -> str:
+        """User message for a single generation request"""
+        return "Please generate 1 natural Japanese sentence."
+
+    def build_basic_sentence(self) -> Optional[tuple[str, str, List[Union[WaniKaniItem, GrammarToken]]]]:
         """
         Build a basic subject-object-verb sentence
         Note: This is a fallback method. Prefer using LLM-generated sentences.
         """
-        available_words = self.get_available_words_by_pos()
-        grammar = self.get_grammar_elements()
+        available_words = self.available_words_by_pos
+        grammar = self.grammar_elements
         
-        # Need at least one noun and one verb
-        if not available_words["noun"] or not available_words["verb"]:
+        # Need at least two distinct nouns and one verb
+        nouns = available_words["noun"]
+        if len(nouns) < 2 or not available_words["verb"]:
             return None
             
         # Build sentence components
-        subject = random.choice(available_words["noun"])
-        object_ = random.choice([n for n in available_words["noun"] if n != subject])
+        subject, object_ = random.sample(nouns, 2)
         verb = random.choice(available_words["verb"])
         
         # Add particles
@@ -144,16 +415,58 @@ class SentenceBuilder:
         
         # Build the sentence
         sentence_items = [subject, wa, object_, wo, verb]
-        japanese = "".join(
-            item['characters'] if isinstance(item, dict) else item.characters
-            for item in sentence_items
-        )
-        reading = "".join(
-            item['reading'] if isinstance(item, dict) else item.primary_reading
-            for item in sentence_items
-        )
+        japanese = []
+        reading = []
+        for item in sentence_items:
+            japanese.append(item.characters)
+            reading.append(item.primary_reading)
         
-        return japanese, reading, sentence_items
+        return "".join(japanese), "".join(reading), sentence_items
+
+    def _cache_key(self, messages: List[Dict[str, str]], num_sentences: int) -> str:
+        """Hash identifying a generation request"""
+        payload = orjson.dumps(
+            {"model": GPT_MODEL, "messages": messages, "n": num_sentences},
+            option=orjson.OPT_SORT_KEYS
+        )
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def _cached_completion(self, key: str) -> Optional[List[Dict[str, str]]]:
+        """Get the sentences of a previous identical request, if fresh enough"""
+        if not self.cache_responses:
+            return None
+        if dbm.whichdb(str(RESPONSE_CACHE_FILE)) is None:
+            # No cache database yet
+            return None
+        with shelve.open(str(RESPONSE_CACHE_FILE), flag="r") as db:
+            entry = db.get(key)
+        # Anything but a (timestamp, sentences) pair is treated as a miss
+        if not (isinstance(entry, tuple) and len(entry) == 2):
+            return None
+        timestamp, sentences = entry
+        if (time.time() - timestamp) / 3600 > RESPONSE_CACHE_MAX_AGE_HOURS:
+            return None
+        return sentences
+
+    def _store_completion(self, key: str, sentences: List[Dict[str, str]]) -> None:
+        """Remember the sentences generated for a request"""
+        if not self.cache_responses or not sentences:
+            return
+        try:
+            RESPONSE_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with shelve.open(str(RESPONSE_CACHE_FILE)) as db:
+                db[key] = (time.time(), sentences)
+        except dbm.error as e:
+            # dbm.error includes OSError. The sentences were generated fine,
+            # only replaying them is lost.
+            print(f"Could not cache GPT response: {e}")
+
+    def _openai_client(self) -> "openai.OpenAI":
+        """Create the OpenAI client on first use, reused for all later calls"""
+        if self._client is None:
+            import openai
+            self._client = openai.OpenAI(api_key=self.openai_api_key)
+        return self._client
 
     def generate_sentence_with_gpt(self, num_sentences: int = 1) -> List[Dict[str, str]]:
         """
@@ -172,74 +485,121 @@ class SentenceBuilder:
         if not self.openai_api_key:
             raise ValueError("OpenAI API key is required for sentence generation")
 
-        prompt = self.get_vocabulary_prompt()
-        prompt += f"\n\nPlease generate {num_sentences} natural Japanese sentence(s) and provide:\n"
-        prompt += "1. The Japanese sentence\n"
-        prompt += "2. The reading in hiragana\n"
-        prompt += "3. English translation\n"
-        prompt += "4. Word-by-word breakdown showing:\n"
-        prompt += "   - The word in Japanese\n"
-        prompt += "   - Its reading\n"
-        prompt += "   - Its meaning\n"
-        prompt += "   - Its part of speech\n\n"
-        prompt += "Format your response in JSON like this:\n"
-        prompt += '''
-{
-  "sentences": [
-    {
-      "japanese": "日本語を勉強します",
-      "reading": "にほんごをべんきょうします",
-      "english": "I will study Japanese",
-      "word_by_word": [
-        {
-          "word": "日本語",
-          "reading": "にほんご",
-          "meaning": "Japanese language",
-          "pos": "noun"
-        },
-        {
-          "word": "を",
-          "reading": "を",
-          "meaning": "object marker",
-          "pos": "particle"
-        },
-        {
-          "word": "勉強",
-          "reading": "べんきょう",
-          "meaning": "study",
-          "pos": "noun"
-        },
-        {
-          "word": "します",
-          "reading": "します",
-          "meaning": "to do",
-          "pos": "verb"
-        }
-      ]
-    }
-  ]
-}
-'''
+        messages = self._messages()
+        cache_key = self._cache_key(messages, num_sentences)
+        cached = self._cached_completion(cache_key)
+        if cached is not None:
+            return cached
 
         try:
-            client = openai.OpenAI(api_key=self.openai_api_key)
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a Japanese language expert. Generate natural Japanese sentences using only the provided vocabulary and grammar elements. Ensure all responses are in the specified JSON format."},
-                    {"role": "user", "content": prompt}
-                ],
+            response = self._openai_client().chat.completions.create(
+                model=GPT_MODEL,
+                messages=messages,
+                # Each completion drafts one sentence, all of them are sampled
+                # from a single request so the prompt is only processed once
+                n=num_sentences,
                 temperature=0.7,
                 response_format={ "type": "json_object" }
             )
             
-            result = json.loads(response.choices[0].message.content)
-            return result["sentences"]
+            sentences = [
+                orjson.loads(choice.message.content)["sentences"][0]
+                for choice in response.choices
+            ]
+            
+        except Exception as e:
+            print(f"Error generating sentences with GPT: {e}")
+            return []
+
+        self._store_completion(cache_key, sentences)
+        return sentences
+
+    def iter_generate_sentence_with_gpt(self, num_sentences: int = 1) -> Iterator[Dict[str, str]]:
+        """
+        Streaming variant of generate_sentence_with_gpt, yielding each sentence
+        as soon as it has been generated instead of after the whole response.
+        """
+        if not self.openai_api_key:
+            raise ValueError("OpenAI API key is required for sentence generation")
+
+        messages = self._messages()
+        cache_key = self._cache_key(messages, num_sentences)
+        cached = self._cached_completion(cache_key)
+        if cached is not None:
+            yield from cached
+            return
+
+        try:
+            response = self._openai_client().chat.completions.create(
+                model=GPT_MODEL,
+                messages=messages,
+                n=num_sentences,
+                temperature=0.7,
+                response_format={ "type": "json_object" },
+                stream=True
+            )
+
+            # Completions are interleaved in the stream, parse each separately
+            parsers = defaultdict(_SentenceStreamParser)
+            # Like generate_sentence_with_gpt, only the first sentence of
+            # each completion is used
+            finished = set()
+            sentences = []
+            for chunk in response:
+                for choice in chunk.choices:
+                    if choice.delta.content and choice.index not in finished:
+                        for sentence in parsers[choice.index].feed(choice.delta.content):
+                            finished.add(choice.index)
+                            sentences.append(sentence)
+                            yield sentence
+                            break
+
+        except Exception as e:
+            print(f"Error generating sentences with GPT: {e}")
+        else:
+            self._store_completion(cache_key, sentences)
+
+    async def _agenerate_one(self, client: "openai.AsyncOpenAI") -> Dict[str, str]:
+        """Generate one sentence with its own completion request"""
+        response = await client.chat.completions.create(
+            model=GPT_MODEL,
+            messages=self._messages(),
+            temperature=0.7,
+            response_format={ "type": "json_object" }
+        )
+        return orjson.loads(response.choices[0].message.content)["sentences"][0]
+
+    async def agenerate(self, n: int = 1) -> List[Dict[str, str]]:
+        """
+        Generate sentences with n independent requests issued concurrently.
+        
+        Unlike generate_sentence_with_gpt, which samples every sentence from
+        one request, each sentence gets its own request.
+        
+        Args:
+            n: Number of sentences to generate
             
+        Returns:
+            List of sentence dictionaries, as generate_sentence_with_gpt
+        """
+        if not self.openai_api_key:
+            raise ValueError("OpenAI API key is required for sentence generation")
+
+        import asyncio
+        import openai
+
+        try:
+            async with openai.AsyncOpenAI(api_key=self.openai_api_key) as client:
+                return list(await asyncio.gather(*[self._agenerate_one(client) for _ in range(n)]))
         except Exception as e:
             print(f"Error generating sentences with GPT: {e}")
             return []
 
+    def generate_sentences_concurrently(self, num_sentences: int = 1) -> List[Dict[str, str]]:
+        """Synchronous wrapper around agenerate"""
+        import asyncio
+        return asyncio.run(self.agenerate(num_sentences))
+
 def main():
     # Get API keys from environment variables
     wanikani_api_key = os.getenv("WANIKANI_API_KEY")
@@ -253,7 +613,9 @@ def main():
         print("Please set your OPENAI_API_KEY environment variable")
         print("Continuing without GPT sentence generation...")
 
-    # Initialize the client and get user knowledge
+    # Initialize the client and get user knowledge, the client pulls in
+    # requests so it is only imported for this demo
+    from wanikani.client import WaniKaniAPI
     client = WaniKaniAPI(wanikani_api_key)
     knowledge = client.get_user_knowledge()
     
@@ -261,25 +623,29 @@ def main():
     builder = SentenceBuilder(knowledge, grammar_level='intermediate', openai_api_key=openai_api_key)
     
     # Get available words by part of speech
-    pos_dict = builder.get_available_words_by_pos()
+    pos_dict = builder.available_words_by_pos
     
-    print("\nAvailable Started Vocabulary by Part of Speech:")
+    # Build the listing in one buffer and write it once instead of per line
+    out = ["\nAvailable Started Vocabulary by Part of Speech:\n"]
     for pos, words in pos_dict.items():
-        print(f"\n{pos.title()}: {len(words)} words")
+        out.append(f"\n{pos.title()}: {len(words)} words\n")
         for word in words[:5]:  # Show first 5 examples
-            print(f"  {word.characters} ({word.primary_reading}) - {word.primary_meaning}")
+            out.append(f"  {word.characters} ({word.primary_reading}) - {word.primary_meaning}\n")
+    sys.stdout.write("".join(out))
     
     if openai_api_key:
         print("\nGenerating sentences with GPT:")
         sentences = builder.generate_sentence_with_gpt(num_sentences=3)
+        out = []
         for i, sentence in enumerate(sentences, 1):
-            print(f"\nSentence {i}:")
-            print(f"Japanese: {sentence['japanese']}")
-            print(f"Reading:  {sentence['reading']}")
-            print(f"English:  {sentence['english']}")
-            print("Word by word:")
+            out.append(f"\nSentence {i}:\n")
+            out.append(f"Japanese: {sentence['japanese']}\n")
+            out.append(f"Reading:  {sentence['reading']}\n")
+            out.append(f"English:  {sentence['english']}\n")
+            out.append("Word by word:\n")
             for word in sentence['word_by_word']:
-                print(f"  {word['word']} ({word['reading']}) - {word['meaning']} [{word['pos']}]")
+                out.append(f"  {word['word']} ({word['reading']}) - {word['meaning']} [{word['pos']}]\n")
+        sys.stdout.write("".join(out))
     else:
         # Fallback to basic sentence generation
         print("\nFalling back to basic sentence generation:")
@@ -291,10 +657,7 @@ def main():
             print(f"Reading: {reading}")
             print("Word-by-word:")
             for item in items:
-                if isinstance(item, dict):
-                    print(f"  {item['characters']} ({item['reading']}) - {item['meaning']}")
-                else:
-                    print(f"  {item.characters} ({item.primary_reading}) - {item.primary_meaning}")
+                print(f"  {item.characters} ({item.primary_reading}) - {item.primary_meaning}")
         else:
             print("\nNot enough vocabulary to build a basic sentence yet.")
 